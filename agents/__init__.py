@@ -8,7 +8,21 @@ Two specialized agents for AWS architecture design and deployment:
 These agents use Agent-to-Agent (A2A) communication to collaborate seamlessly.
 """
 
-from .onboarding_agent_runtime import OnboardingAgent
-from .provisioning_agent_runtime import ProvisioningAgent
+# Agent classes are imported on first access: importing the package (e.g. to
+# reach agents.onboarding_agent:app from a Uvicorn worker) must not pull in
+# Strands, boto3 and the MCP client for both agents.
+_LAZY_IMPORTS = {
+    'OnboardingAgent': '.onboarding_agent_runtime',
+    'ProvisioningAgent': '.provisioning_agent_runtime',
+}
 
 __all__ = ['OnboardingAgent', 'ProvisioningAgent']
+
+
+def __getattr__(name):
+    if name in _LAZY_IMPORTS:
+        from importlib import import_module
+        value = getattr(import_module(_LAZY_IMPORTS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
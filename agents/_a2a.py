@@ -0,0 +1,239 @@
+"""
+Shared Agent-to-Agent (A2A) client and agent server plumbing
+
+One pooled httpx client per process, cached agent cards and A2A clients, and
+the a2a_stream()/a2a_send_stream()/a2a_send() helpers used by every A2A
+collaboration tool. Also the pieces every agent server repeats: the FastAPI
+lifespan, the Bedrock model settings and the Uvicorn launcher.
+"""
+
+import logging
+import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from uuid import uuid4
+import httpx
+import uvicorn
+from a2a.client import A2ACardResolver, ClientCallContext, ClientConfig, ClientFactory
+from a2a.client.errors import A2AClientHTTPError
+from a2a.types import (
+    AgentCard, Message, Part, Role, TaskArtifactUpdateEvent, TaskStatusUpdateEvent, TextPart,
+)
+from strands.models import BedrockModel
+
+logger = logging.getLogger(__name__)
+
+# Agent cards only change on redeploy; re-fetch them at most every 5 minutes
+AGENT_CARD_TTL = 300
+
+_HTTPX: httpx.AsyncClient | None = None
+_A2A_FACTORY: ClientFactory | None = None
+_A2A_CLIENTS: dict = {}
+_AGENT_CARD_CACHE: dict[str, tuple[float, AgentCard]] = {}
+
+
+def open_client() -> ClientFactory:
+    """Create the shared httpx client and A2A client factory once (FastAPI lifespan)."""
+    global _HTTPX, _A2A_FACTORY
+    if _HTTPX is None:
+        _HTTPX = httpx.AsyncClient(
+            timeout=httpx.Timeout(600),
+            limits=httpx.Limits(max_connections=200, max_keepalive_connections=50),
+            http2=True,
+            # Agent replies embed full templates; let peers gzip them
+            headers={"Accept-Encoding": "gzip, deflate"},
+        )
+        # Streaming (SSE) is used whenever the remote card advertises it
+        _A2A_FACTORY = ClientFactory(ClientConfig(httpx_client=_HTTPX, streaming=True))
+    return _A2A_FACTORY
+
+
+async def close_client() -> None:
+    """Close the shared httpx client and drop everything built on top of it."""
+    global _HTTPX, _A2A_FACTORY
+    _A2A_FACTORY = None
+    _A2A_CLIENTS.clear()
+    _AGENT_CARD_CACHE.clear()
+    if _HTTPX is not None:
+        await _HTTPX.aclose()
+        _HTTPX = None
+
+
+@asynccontextmanager
+async def lifespan(app) -> AsyncIterator[None]:
+    """FastAPI lifespan: open the shared client on startup, close it on shutdown."""
+    open_client()
+    yield
+    await close_client()
+
+
+async def _get_a2a_client(base_url: str):
+    """Return the A2A client for base_url, re-resolving the agent card after its TTL."""
+    factory = open_client()
+
+    fetched_at, agent_card = _AGENT_CARD_CACHE.get(base_url, (0.0, None))
+    if agent_card is None or time.monotonic() - fetched_at > AGENT_CARD_TTL:
+        resolver = A2ACardResolver(httpx_client=_HTTPX, base_url=base_url)
+        agent_card = await resolver.get_agent_card()
+        _AGENT_CARD_CACHE[base_url] = (time.monotonic(), agent_card)
+        _A2A_CLIENTS.pop(base_url, None)
+
+    client = _A2A_CLIENTS.get(base_url)
+    if client is None:
+        client = factory.create(agent_card)
+        _A2A_CLIENTS[base_url] = client
+    return client
+
+
+def _invalidate_a2a_client(base_url: str) -> None:
+    """Forget the cached agent card and client so the next call re-resolves them."""
+    _AGENT_CARD_CACHE.pop(base_url, None)
+    _A2A_CLIENTS.pop(base_url, None)
+
+
+def _part_text(part: Part) -> str:
+    # Part is a pydantic RootModel; the TextPart lives on .root
+    return getattr(getattr(part, 'root', part), 'text', None) or ""
+
+
+async def a2a_stream(target_url: str, message_text: str,
+                     timeout: float = 600) -> AsyncIterator[tuple[str, str]]:
+    """
+    Send a text message to another agent via A2A and yield its reply as it streams.
+
+    Yields (kind, text) pairs: "progress" for interim status messages and
+    "result" for reply messages and artifact chunks.
+
+    Raises:
+        A2AClientHTTPError: remote agent returned an HTTP error
+    """
+    client = await _get_a2a_client(target_url)
+
+    msg = Message(
+        kind="message",
+        role=Role.user,
+        parts=[Part(TextPart(kind="text", text=message_text))],
+        message_id=uuid4().hex,
+    )
+    context = ClientCallContext(state={"http_kwargs": {"timeout": timeout}})
+
+    streamed_result = False
+    try:
+        async for event in client.send_message(msg, context=context):
+            if isinstance(event, Message):
+                yield "result", "".join(_part_text(part) for part in event.parts)
+                continue
+
+            task, update = event
+            if isinstance(update, TaskArtifactUpdateEvent):
+                streamed_result = True
+                yield "result", "".join(_part_text(part) for part in update.artifact.parts)
+            elif isinstance(update, TaskStatusUpdateEvent) and update.status.message:
+                yield "progress", "".join(_part_text(part) for part in update.status.message.parts)
+            elif update is None and not streamed_result and task.artifacts:
+                # Non-streaming peers return the finished task in one piece
+                streamed_result = True
+                for artifact in task.artifacts:
+                    yield "result", "".join(_part_text(part) for part in artifact.parts)
+    except A2AClientHTTPError as e:
+        # A redeployed or re-secured agent invalidates the cached card
+        if e.status_code in (401, 404):
+            _invalidate_a2a_client(target_url)
+        raise
+
+
+async def a2a_send_stream(target_url: str, message_text: str, timeout: float = 600,
+                          result_key: str = "response") -> AsyncIterator[dict]:
+    """
+    Send a text message to another agent via A2A, relaying its reply as it streams.
+
+    Args:
+        target_url: Base URL of the remote agent
+        message_text: Text of the user message to send
+        timeout: HTTP timeout in seconds for this call
+        result_key: Key under which the reply text is returned
+
+    Yields:
+        {"partial": text} for every streamed chunk, then
+        {"success": True, result_key: reply} or {"success": False, "error": ...}
+    """
+    results: list[str] = []
+    progress: list[str] = []
+    try:
+        async for kind, text in a2a_stream(target_url, message_text, timeout):
+            if kind == "result":
+                results.append(text)
+            else:
+                progress.append(text)
+            yield {"partial": text}
+    except Exception as e:
+        logger.error(f"❌ A2A call to {target_url} failed: {e}")
+        yield {"success": False, "error": str(e)}
+        return
+
+    # Status messages carry the reply only when no artifact/message was sent
+    reply = "".join(results or progress)
+    if not reply:
+        yield {"success": False, "error": "No response from remote agent"}
+        return
+    yield {"success": True, result_key: reply}
+
+
+async def a2a_send(target_url: str, message_text: str, timeout: float = 600,
+                   result_key: str = "response") -> dict:
+    """
+    Send a text message to another agent via A2A and wait for its reply.
+
+    Args:
+        target_url: Base URL of the remote agent
+        message_text: Text of the user message to send
+        timeout: HTTP timeout in seconds for this call
+        result_key: Key under which the reply text is returned
+
+    Returns:
+        {"success": True, result_key: reply} or {"success": False, "error": ...}
+    """
+    async for event in a2a_send_stream(target_url, message_text, timeout, result_key):
+        if "partial" not in event:
+            return event
+
+
+def bedrock_model(model_id: str, region_name: str) -> BedrockModel:
+    """
+    Bedrock model shared by all agents.
+
+    System prompt and tool specs are byte-identical on every request, so
+    Bedrock can serve them from the prompt cache on subsequent turns.
+    """
+    return BedrockModel(
+        model_id=model_id,
+        region_name=region_name,
+        cache_prompt="default",
+        cache_tools="default",
+    )
+
+
+def run(module_name: str, app) -> None:
+    """
+    Serve an agent module's FastAPI app with Uvicorn on port 9000.
+
+    Args:
+        module_name: Name of the agent module in this package that defines app
+        app: The FastAPI app, served in-process when there is a single worker
+    """
+    # One worker by default: the agent's conversation history lives in this
+    # process and AgentCore pins a session to one container, so a second
+    # worker would answer follow-up turns without that history. Only raise
+    # WEB_CONCURRENCY once conversation state is stored outside the process.
+    workers = int(os.environ.get("WEB_CONCURRENCY", "1"))
+    # Uvicorn can only spawn workers from an import string
+    app_path = f"{__package__}.{module_name}:app" if __package__ else f"{module_name}:app"
+    uvicorn.run(
+        app_path if workers > 1 else app,
+        host="0.0.0.0",
+        port=9000,
+        loop="uvloop",
+        http="httptools",
+        workers=workers,
+    )
@@ -0,0 +1,44 @@
+"""
+Shared CloudFormation client
+
+One boto3 CloudFormation client per process, plus the thread pools that run
+its blocking calls off the event loop, used by every agent's CloudFormation
+tools.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+import boto3
+from botocore.config import Config
+
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+
+# boto3 clients are thread-safe: build once, share across tool calls so the
+# urllib3 pool keeps connections alive from validate through deploy and polling.
+# Adaptive retries absorb CloudFormation throttling inside the call instead
+# of surfacing it to the LLM as a failed tool result.
+CFN = boto3.client(
+    'cloudformation',
+    region_name=AWS_REGION,
+    config=Config(
+        retries={'max_attempts': 10, 'mode': 'adaptive'},
+        max_pool_connections=50
+    )
+)
+
+# Blocking CloudFormation calls get their own threads, one per pooled
+# connection, instead of the event loop's small default executor
+CFN_EXECUTOR = ThreadPoolExecutor(max_workers=50, thread_name_prefix='cfn')
+
+# Stack waiters block for up to an hour each; keep them off CFN_EXECUTOR so
+# long waits never starve validate/deploy/status calls
+WAITER_EXECUTOR = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('STACK_WAITER_MAX_WORKERS', '16')),
+    thread_name_prefix='cfn-waiter'
+)
+
+
+async def run_cfn(func, *args, executor: ThreadPoolExecutor = CFN_EXECUTOR):
+    """Run a blocking CloudFormation call on executor and return its result."""
+    return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
@@ -0,0 +1,84 @@
+"""
+Semantic response cache for A2A design requests
+
+Embeds the normalized request text with Amazon Titan Text Embeddings and
+returns a previously stored response when a new request is close enough
+(cosine similarity) to one that was already answered.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import boto3
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_MODEL_ID = os.environ.get('SEMANTIC_CACHE_MODEL_ID', 'amazon.titan-embed-text-v2:0')
+SIMILARITY_THRESHOLD = float(os.environ.get('SEMANTIC_CACHE_THRESHOLD', '0.93'))
+MAX_ENTRIES = int(os.environ.get('SEMANTIC_CACHE_MAX_ENTRIES', '256'))
+
+
+class SemanticCache:
+    """
+    In-process semantic cache keyed by request embeddings.
+
+    Embeddings are requested unit-length, so cosine similarity is a plain dot
+    product. Entries are evicted oldest-first once max_entries is reached.
+    """
+
+    def __init__(self, region_name: str, threshold: float = SIMILARITY_THRESHOLD,
+                 max_entries: int = MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries: list[tuple[list[float], dict]] = []
+        self._lock = threading.Lock()
+        self._bedrock = boto3.client('bedrock-runtime', region_name=region_name)
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        return " ".join(text.lower().split())
+
+    def embed(self, text: str) -> list[float]:
+        response = self._bedrock.invoke_model(
+            modelId=EMBEDDING_MODEL_ID,
+            body=json.dumps({"inputText": self.normalize(text), "normalize": True})
+        )
+        return json.loads(response['body'].read())['embedding']
+
+    async def aembed(self, text: str) -> list[float] | None:
+        """Embed text off the event loop; returns None if embedding fails."""
+        try:
+            return await asyncio.to_thread(self.embed, text)
+        except Exception as e:
+            logger.warning(f"Semantic cache disabled for this request: {e}")
+            return None
+
+    def get(self, embedding: list[float] | None) -> dict | None:
+        if embedding is None:
+            return None
+
+        best_score, best_value = 0.0, None
+        with self._lock:
+            for vector, value in self._entries:
+                score = sum(a * b for a, b in zip(vector, embedding))
+                if score > best_score:
+                    best_score, best_value = score, value
+
+        return best_value if best_score >= self.threshold else None
+
+    async def aget(self, embedding: list[float] | None) -> dict | None:
+        """Look up off the event loop; the scan is pure Python over every entry."""
+        if embedding is None:
+            return None
+        return await asyncio.to_thread(self.get, embedding)
+
+    def put(self, embedding: list[float] | None, value: dict) -> None:
+        if embedding is None:
+            return
+
+        with self._lock:
+            self._entries.append((embedding, value))
+            if len(self._entries) > self.max_entries:
+                del self._entries[0]
@@ -0,0 +1,57 @@
+"""
+Validation result cache for CloudFormation templates
+
+Results of cfn.validate_template are keyed by the SHA-256 of the template
+body, so re-validating an unchanged template is free. Failed validations
+are kept only briefly, which stops the model from re-submitting the same
+broken template without pinning transient errors (throttling, credentials).
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from time import monotonic
+
+MAX_ENTRIES = int(os.environ.get('VALIDATION_CACHE_MAX_ENTRIES', '128'))
+NEGATIVE_TTL = float(os.environ.get('VALIDATION_CACHE_NEGATIVE_TTL', '60'))
+
+
+class ValidationCache:
+    """
+    In-process LRU cache of validation results keyed by template hash.
+
+    The cache is per process, so each agent (and each Uvicorn worker) keeps
+    its own copy.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, negative_ttl: float = NEGATIVE_TTL):
+        self.max_entries = max_entries
+        self.negative_ttl = negative_ttl
+        self._entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(template_body: str) -> str:
+        return hashlib.sha256(template_body.encode()).hexdigest()
+
+    def get(self, key: str) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, result = entry
+            if expires_at and monotonic() > expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        # Callers (and the model) may mutate the result; hand out copies
+        return dict(result)
+
+    def put(self, key: str, result: dict) -> None:
+        expires_at = 0.0 if result.get('valid') else monotonic() + self.negative_ttl
+        with self._lock:
+            self._entries[key] = (expires_at, dict(result))
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -7,59 +7,84 @@ and can collaborate with Provisioning Agent via A2A.
 
 import logging
 import os
-from uuid import uuid4
-import httpx
-from a2a.client import A2ACardResolver, ClientConfig, ClientFactory
-from a2a.types import Message, Part, Role, TextPart
+from collections.abc import AsyncIterator
 from strands import Agent, tool
 from strands.multiagent.a2a import A2AServer
-import uvicorn
 from fastapi import FastAPI
-import boto3
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
 import yaml
 import json
 
+try:
+    from ._a2a import a2a_send_stream, bedrock_model, lifespan, run
+    from ._cfn import CFN, run_cfn
+    from ._validation_cache import ValidationCache
+except ImportError:  # run as a script: python agents/<agent>.py
+    from _a2a import a2a_send_stream, bedrock_model, lifespan, run
+    from _cfn import CFN, run_cfn
+    from _validation_cache import ValidationCache
+
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # Configuration
 PROVISIONING_AGENT_URL = os.environ.get('PROVISIONING_AGENT_URL')
 AGENTCORE_RUNTIME_URL = os.environ.get('AGENTCORE_RUNTIME_URL', 'http://0.0.0.0:9000/')
+BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'us.anthropic.claude-sonnet-4-20250514-v1:0')
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
 
+_VALIDATION_CACHE = ValidationCache()
+
 
 # Simple deterministic tools (no LLM)
-@tool
-def validate_cfn_template(template_body: str) -> dict:
-    """
-    Validate CloudFormation template using AWS API.
-    
-    Args:
-        template_body: CloudFormation template (YAML or JSON string)
-        
-    Returns:
-        Validation result with capabilities required
-    """
+def _validate_cfn_template(template_body: str) -> dict:
+    key = ValidationCache.key(template_body)
+    cached = _VALIDATION_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        cfn = boto3.client('cloudformation', region_name=AWS_REGION)
-        response = cfn.validate_template(TemplateBody=template_body)
+        response = CFN.validate_template(TemplateBody=template_body)
         
-        return {
+        result = {
             "success": True,
             "valid": True,
             "capabilities": response.get('Capabilities', []),
             "parameters": response.get('Parameters', [])
         }
     except Exception as e:
-        return {
+        result = {
             "success": False,
             "valid": False,
             "error": str(e)
         }
 
+    _VALIDATION_CACHE.put(key, result)
+    return result
+
+
+@tool
+async def validate_cfn_template(template_body: str) -> dict:
+    """
+    Validate CloudFormation template using AWS API.
+    
+    Args:
+        template_body: CloudFormation template (YAML or JSON string)
+        
+    Returns:
+        Validation result with capabilities required
+    """
+    return await run_cfn(_validate_cfn_template, template_body)
+
+
+DEPLOY_REQUEST_PREAMBLE = """Deploy this CloudFormation template to AWS.
+
+Please validate, deploy, monitor progress, and report the results with stack outputs."""
+
 
 @tool
-async def deploy_with_provisioning_agent(template_body: str, stack_name: str) -> dict:
+async def deploy_with_provisioning_agent(template_body: str, stack_name: str) -> AsyncIterator[dict]:
     """
     Deploy CloudFormation template using the Provisioning Agent via A2A.
     
@@ -69,64 +94,29 @@ async def deploy_with_provisioning_agent(template_body: str, stack_name: str) ->
         template_body: Validated CloudFormation template
         stack_name: Name for the CloudFormation stack
         
-    Returns:
-        Deployment result from Provisioning Agent
+    Yields:
+        {"partial": text} as the Provisioning Agent reports progress,
+        then the deployment result from Provisioning Agent
     """
     if not PROVISIONING_AGENT_URL:
-        return {
+        yield {
             "success": False,
             "error": "Provisioning Agent not configured. Deploy Provisioning Agent first."
         }
+        return
     
-    try:
-        logger.info(f"🤝 Calling Provisioning Agent via A2A: {stack_name}")
-        
-        async with httpx.AsyncClient(timeout=600) as httpx_client:
-            # Get Provisioning Agent card
-            resolver = A2ACardResolver(httpx_client=httpx_client, base_url=PROVISIONING_AGENT_URL)
-            agent_card = await resolver.get_agent_card()
-            
-            # Create A2A client
-            config = ClientConfig(httpx_client=httpx_client, streaming=False)
-            factory = ClientFactory(config)
-            client = factory.create(agent_card)
-            
-            # Create message for Provisioning Agent
-            message_text = f"""Deploy this CloudFormation template to AWS:
+    logger.info(f"🤝 Calling Provisioning Agent via A2A: {stack_name}")
+    
+    message_text = f"""{DEPLOY_REQUEST_PREAMBLE}
 
 Stack Name: {stack_name}
 
 Template:
-{template_body}
-
-Please validate, deploy, monitor progress, and report the results with stack outputs."""
-            
-            msg = Message(
-                kind="message",
-                role=Role.user,
-                parts=[Part(TextPart(kind="text", text=message_text))],
-                message_id=uuid4().hex,
-            )
-            
-            # Send message and get response
-            async for event in client.send_message(msg):
-                if isinstance(event, Message):
-                    response_text = ""
-                    for part in event.parts:
-                        if hasattr(part, 'text'):
-                            response_text += part.text
-                    
-                    logger.info(f"✅ Received response from Provisioning Agent")
-                    return {
-                        "success": True,
-                        "deployment_response": response_text
-                    }
-            
-            return {"success": False, "error": "No response from Provisioning Agent"}
-            
-    except Exception as e:
-        logger.error(f"❌ Error calling Provisioning Agent: {e}")
-        return {"success": False, "error": str(e)}
+{template_body}"""
+    
+    async for event in a2a_send_stream(PROVISIONING_AGENT_URL, message_text, timeout=600,
+                                       result_key="deployment_response"):
+        yield event
 
 
 # Create Strands Agent
@@ -134,6 +124,7 @@ Please validate, deploy, monitor progress, and report the results with stack out
 onboarding_agent = Agent(
     name="AWS Onboarding Agent",
     description="AWS Solutions Architect that designs cloud architectures and generates CloudFormation templates",
+    model=bedrock_model(BEDROCK_MODEL_ID, AWS_REGION),
     tools=[
         validate_cfn_template,
         deploy_with_provisioning_agent
@@ -196,7 +187,8 @@ a2a_server = A2AServer(
 )
 
 # Create FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 @app.get("/ping")
 def ping():
@@ -210,4 +202,4 @@ if __name__ == "__main__":
     logger.info("🏗️  Starting Onboarding Agent (Strands A2A)")
     logger.info(f"Runtime URL: {AGENTCORE_RUNTIME_URL}")
     logger.info(f"Provisioning Agent: {PROVISIONING_AGENT_URL or 'Not configured yet'}")
-    uvicorn.run(app, host="0.0.0.0", port=9000)
+    run("onboarding_agent", app)
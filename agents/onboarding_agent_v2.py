@@ -6,15 +6,18 @@ AWS Architecture design agent that uses AWS Labs CFN MCP server for deterministi
 
 import logging
 import os
-from uuid import uuid4
-import httpx
-from a2a.client import A2ACardResolver, ClientConfig, ClientFactory
-from a2a.types import Message, Part, Role, TextPart
+from collections.abc import AsyncIterator
 from strands import Agent, tool
 from strands.multiagent.a2a import A2AServer
 from strands_tools.mcp import MCPClient
-import uvicorn
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+
+try:
+    from ._a2a import a2a_send_stream, bedrock_model, lifespan, run
+except ImportError:  # run as a script: python agents/<agent>.py
+    from _a2a import a2a_send_stream, bedrock_model, lifespan, run
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,6 +25,9 @@ logger = logging.getLogger(__name__)
 # Configuration
 PROVISIONING_AGENT_URL = os.environ.get('PROVISIONING_AGENT_URL')
 AGENTCORE_RUNTIME_URL = os.environ.get('AGENTCORE_RUNTIME_URL', 'http://0.0.0.0:9000/')
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'us.anthropic.claude-sonnet-4-20250514-v1:0')
+
 
 # Connect to AWS Labs CFN MCP Server
 logger.info("Connecting to AWS Labs CFN MCP Server...")
@@ -30,9 +36,14 @@ cfn_tools = mcp_client.get_tools()
 
 logger.info(f"Loaded {len(cfn_tools)} tools from AWS Labs CFN MCP Server")
 
+DEPLOY_REQUEST_PREAMBLE = """Deploy this CloudFormation template.
+
+Please deploy, monitor progress, and report results."""
+
+
 # A2A collaboration tool
 @tool
-async def deploy_with_provisioning_agent(template_body: str, stack_name: str) -> dict:
+async def deploy_with_provisioning_agent(template_body: str, stack_name: str) -> AsyncIterator[dict]:
     """
     Deploy CloudFormation template using the Provisioning Agent via A2A.
     
@@ -40,66 +51,36 @@ async def deploy_with_provisioning_agent(template_body: str, stack_name: str) ->
         template_body: CloudFormation template to deploy
         stack_name: Name for the CloudFormation stack
         
-    Returns:
-        Deployment result from Provisioning Agent
+    Yields:
+        {"partial": text} as the Provisioning Agent reports progress,
+        then the deployment result from Provisioning Agent
     """
     if not PROVISIONING_AGENT_URL:
-        return {
+        yield {
             "success": False,
             "error": "Provisioning Agent not configured"
         }
+        return
     
-    try:
-        logger.info(f"🤝 Calling Provisioning Agent via A2A: {stack_name}")
-        
-        async with httpx.AsyncClient(timeout=600) as httpx_client:
-            resolver = A2ACardResolver(httpx_client=httpx_client, base_url=PROVISIONING_AGENT_URL)
-            agent_card = await resolver.get_agent_card()
-            
-            config = ClientConfig(httpx_client=httpx_client, streaming=False)
-            factory = ClientFactory(config)
-            client = factory.create(agent_card)
-            
-            message_text = f"""Deploy this CloudFormation template:
+    logger.info(f"🤝 Calling Provisioning Agent via A2A: {stack_name}")
+    
+    message_text = f"""{DEPLOY_REQUEST_PREAMBLE}
 
 Stack Name: {stack_name}
 
 Template:
-{template_body}
-
-Please deploy, monitor progress, and report results."""
-            
-            msg = Message(
-                kind="message",
-                role=Role.user,
-                parts=[Part(TextPart(kind="text", text=message_text))],
-                message_id=uuid4().hex,
-            )
-            
-            async for event in client.send_message(msg):
-                if isinstance(event, Message):
-                    response_text = ""
-                    for part in event.parts:
-                        if hasattr(part, 'text'):
-                            response_text += part.text
-                    
-                    logger.info(f"✅ Received response from Provisioning Agent")
-                    return {
-                        "success": True,
-                        "deployment_response": response_text
-                    }
-            
-            return {"success": False, "error": "No response"}
-            
-    except Exception as e:
-        logger.error(f"❌ Error calling Provisioning Agent: {e}")
-        return {"success": False, "error": str(e)}
+{template_body}"""
+    
+    async for event in a2a_send_stream(PROVISIONING_AGENT_URL, message_text, timeout=600,
+                                       result_key="deployment_response"):
+        yield event
 
 
 # Create Strands Agent with AWS Labs MCP tools
 onboarding_agent = Agent(
     name="AWS Onboarding Agent",
     description="AWS Solutions Architect using AWS Labs CFN MCP server for CloudFormation operations",
+    model=bedrock_model(BEDROCK_MODEL_ID, AWS_REGION),
     tools=[*cfn_tools, deploy_with_provisioning_agent],
     system_prompt="""You are an AWS Solutions Architect AI assistant.
 
@@ -132,7 +113,8 @@ a2a_server = A2AServer(
 )
 
 # Create FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 @app.get("/ping")
 def ping():
@@ -145,4 +127,4 @@ if __name__ == "__main__":
     logger.info("🏗️  Starting Onboarding Agent v2 (AWS Labs CFN MCP)")
     logger.info(f"Runtime URL: {AGENTCORE_RUNTIME_URL}")
     logger.info(f"MCP Tools: {len(cfn_tools)}")
-    uvicorn.run(app, host="0.0.0.0", port=9000)
+    run("onboarding_agent_v2", app)
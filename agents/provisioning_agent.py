@@ -7,16 +7,25 @@ Can request design help from Onboarding Agent via A2A.
 
 import logging
 import os
+import threading
 import time
-from uuid import uuid4
-import httpx
-from a2a.client import A2ACardResolver, ClientConfig, ClientFactory
-from a2a.types import Message, Part, Role, TextPart
 from strands import Agent, tool
 from strands.multiagent.a2a import A2AServer
-import uvicorn
 from fastapi import FastAPI
-import boto3
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from botocore.exceptions import ClientError, WaiterError
+
+try:
+    from ._a2a import a2a_send, bedrock_model, lifespan, run
+    from ._cfn import CFN, WAITER_EXECUTOR, run_cfn
+    from ._semantic_cache import SemanticCache
+    from ._validation_cache import ValidationCache
+except ImportError:  # run as a script: python agents/<agent>.py
+    from _a2a import a2a_send, bedrock_model, lifespan, run
+    from _cfn import CFN, WAITER_EXECUTOR, run_cfn
+    from _semantic_cache import SemanticCache
+    from _validation_cache import ValidationCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -24,60 +33,86 @@ logger = logging.getLogger(__name__)
 # Configuration
 ONBOARDING_AGENT_URL = os.environ.get('ONBOARDING_AGENT_URL')
 AGENTCORE_RUNTIME_URL = os.environ.get('AGENTCORE_RUNTIME_URL', 'http://0.0.0.0:9000/')
+BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'us.anthropic.claude-sonnet-4-20250514-v1:0')
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
 
+# Similar design requests are answered from cache instead of a full A2A turn
+_DESIGN_CACHE = SemanticCache(region_name=AWS_REGION)
+_VALIDATION_CACHE = ValidationCache()
+
+
+# Stack names known to exist, loaded once with a paginated list_stacks and
+# kept current as stacks are created, so deploys skip a describe_stacks probe
+_LIVE_STACK_STATUSES = [
+    'CREATE_IN_PROGRESS', 'CREATE_FAILED', 'CREATE_COMPLETE',
+    'ROLLBACK_IN_PROGRESS', 'ROLLBACK_FAILED', 'ROLLBACK_COMPLETE',
+    'DELETE_IN_PROGRESS', 'DELETE_FAILED',
+    'UPDATE_IN_PROGRESS', 'UPDATE_COMPLETE_CLEANUP_IN_PROGRESS', 'UPDATE_COMPLETE', 'UPDATE_FAILED',
+    'UPDATE_ROLLBACK_IN_PROGRESS', 'UPDATE_ROLLBACK_FAILED',
+    'UPDATE_ROLLBACK_COMPLETE_CLEANUP_IN_PROGRESS', 'UPDATE_ROLLBACK_COMPLETE',
+    'REVIEW_IN_PROGRESS',
+    'IMPORT_IN_PROGRESS', 'IMPORT_COMPLETE',
+    'IMPORT_ROLLBACK_IN_PROGRESS', 'IMPORT_ROLLBACK_FAILED', 'IMPORT_ROLLBACK_COMPLETE',
+]
+_STACK_EXISTS: set[str] = set()
+_STACK_EXISTS_LOADED = False
+_STACK_EXISTS_LOCK = threading.Lock()
+
+
+def _stack_exists(stack_name: str) -> bool:
+    global _STACK_EXISTS_LOADED
+    with _STACK_EXISTS_LOCK:
+        if not _STACK_EXISTS_LOADED:
+            paginator = CFN.get_paginator('list_stacks')
+            for page in paginator.paginate(StackStatusFilter=_LIVE_STACK_STATUSES):
+                _STACK_EXISTS.update(summary['StackName'] for summary in page['StackSummaries'])
+            _STACK_EXISTS_LOADED = True
+        return stack_name in _STACK_EXISTS
+
 
 # Simple deterministic tools (no LLM)
-@tool
-def validate_cfn_template(template_body: str) -> dict:
-    """
-    Validate CloudFormation template using AWS API.
-    
-    Args:
-        template_body: CloudFormation template (YAML or JSON string)
-        
-    Returns:
-        Validation result
-    """
+def _validate_cfn_template(template_body: str) -> dict:
+    key = ValidationCache.key(template_body)
+    cached = _VALIDATION_CACHE.get(key)
+    if cached is not None:
+        return cached
+
     try:
-        cfn = boto3.client('cloudformation', region_name=AWS_REGION)
-        response = cfn.validate_template(TemplateBody=template_body)
+        response = CFN.validate_template(TemplateBody=template_body)
         
-        return {
+        result = {
             "success": True,
             "valid": True,
             "capabilities": response.get('Capabilities', [])
         }
     except Exception as e:
-        return {
+        result = {
             "success": False,
             "valid": False,
             "error": str(e)
         }
 
+    _VALIDATION_CACHE.put(key, result)
+    return result
+
 
 @tool
-def deploy_cfn_stack(stack_name: str, template_body: str, capabilities: list = None) -> dict:
+async def validate_cfn_template(template_body: str) -> dict:
     """
-    Deploy CloudFormation stack to AWS.
+    Validate CloudFormation template using AWS API.
     
     Args:
-        stack_name: Name for the CloudFormation stack
-        template_body: CloudFormation template
-        capabilities: IAM capabilities (optional)
+        template_body: CloudFormation template (YAML or JSON string)
         
     Returns:
-        Deployment result with stack ID
+        Validation result
     """
+    return await run_cfn(_validate_cfn_template, template_body)
+
+
+def _deploy_cfn_stack(stack_name: str, template_body: str, capabilities: list = None) -> dict:
     try:
-        cfn = boto3.client('cloudformation', region_name=AWS_REGION)
-        
-        # Check if stack exists
-        try:
-            cfn.describe_stacks(StackName=stack_name)
-            stack_exists = True
-        except:
-            stack_exists = False
+        stack_exists = _stack_exists(stack_name)
         
         params = {
             'StackName': stack_name,
@@ -90,11 +125,28 @@ def deploy_cfn_stack(stack_name: str, template_body: str, capabilities: list = N
             params['Capabilities'] = ['CAPABILITY_IAM', 'CAPABILITY_NAMED_IAM']
         
         if stack_exists:
-            response = cfn.update_stack(**params)
-            action = 'updated'
-        else:
-            response = cfn.create_stack(**params)
-            action = 'created'
+            try:
+                response = CFN.update_stack(**params)
+                action = 'updated'
+            except ClientError as e:
+                # Cached list is stale: the stack was deleted outside this agent
+                error = e.response['Error']
+                if error['Code'] != 'ValidationError' or 'does not exist' not in error['Message']:
+                    raise
+                _STACK_EXISTS.discard(stack_name)
+                stack_exists = False
+
+        if not stack_exists:
+            try:
+                response = CFN.create_stack(**params)
+                action = 'created'
+            except ClientError as e:
+                # Cached list is stale: the stack was created outside this agent
+                if e.response['Error']['Code'] != 'AlreadyExistsException':
+                    raise
+                response = CFN.update_stack(**params)
+                action = 'updated'
+            _STACK_EXISTS.add(stack_name)
         
         return {
             "success": True,
@@ -110,19 +162,24 @@ def deploy_cfn_stack(stack_name: str, template_body: str, capabilities: list = N
 
 
 @tool
-def get_stack_status(stack_name: str) -> dict:
+async def deploy_cfn_stack(stack_name: str, template_body: str, capabilities: list = None) -> dict:
     """
-    Get CloudFormation stack status and outputs.
+    Deploy CloudFormation stack to AWS.
     
     Args:
-        stack_name: Name of the CloudFormation stack
+        stack_name: Name for the CloudFormation stack
+        template_body: CloudFormation template
+        capabilities: IAM capabilities (optional)
         
     Returns:
-        Stack status, outputs, and details
+        Deployment result with stack ID
     """
+    return await run_cfn(_deploy_cfn_stack, stack_name, template_body, capabilities)
+
+
+def _get_stack_status(stack_name: str) -> dict:
     try:
-        cfn = boto3.client('cloudformation', region_name=AWS_REGION)
-        response = cfn.describe_stacks(StackName=stack_name)
+        response = CFN.describe_stacks(StackName=stack_name)
         stack = response['Stacks'][0]
         
         outputs = []
@@ -148,6 +205,80 @@ def get_stack_status(stack_name: str) -> dict:
         }
 
 
+@tool
+async def get_stack_status(stack_name: str) -> dict:
+    """
+    Get CloudFormation stack status and outputs.
+    
+    Args:
+        stack_name: Name of the CloudFormation stack
+        
+    Returns:
+        Stack status, outputs, and details
+    """
+    return await run_cfn(_get_stack_status, stack_name)
+
+
+# CloudFormation waiter to run for each terminal status the caller waits on
+_STACK_WAITERS = {
+    'CREATE_COMPLETE': 'stack_create_complete',
+    'UPDATE_COMPLETE': 'stack_update_complete',
+    'IMPORT_COMPLETE': 'stack_import_complete',
+    'UPDATE_ROLLBACK_COMPLETE': 'stack_rollback_complete',
+}
+
+
+def _wait_for_stack(stack_name: str, desired_statuses: list = None, timeout: int = 3600) -> dict:
+    desired_statuses = desired_statuses or ['CREATE_COMPLETE']
+    waiter_name = next(
+        (_STACK_WAITERS[s] for s in desired_statuses if s in _STACK_WAITERS),
+        'stack_create_complete'
+    )
+    
+    try:
+        CFN.get_waiter(waiter_name).wait(
+            StackName=stack_name,
+            WaiterConfig={'Delay': 15, 'MaxAttempts': max(1, -(-timeout // 15))}
+        )
+    except WaiterError as e:
+        # Failure or timeout: report whatever state the stack ended up in
+        logger.warning(f"Waiter {waiter_name} stopped for {stack_name}: {e}")
+    
+    result = _get_stack_status(stack_name)
+    if result["success"]:
+        result["reached_desired_status"] = result["status"] in desired_statuses
+    return result
+
+
+@tool
+async def wait_for_stack(stack_name: str, desired_statuses: list = None, timeout: int = 3600) -> dict:
+    """
+    Wait until a CloudFormation stack finishes deploying, then return its status.
+    
+    Use this right after deploy_cfn_stack instead of polling get_stack_status:
+    the wait runs server-side, so one call covers the whole deployment.
+    
+    Args:
+        stack_name: Name of the CloudFormation stack
+        desired_statuses: Terminal statuses to wait for (default: ["CREATE_COMPLETE"])
+        timeout: Maximum seconds to wait (default: 3600)
+        
+    Returns:
+        Final stack status, outputs, and whether a desired status was reached
+    """
+    return await run_cfn(_wait_for_stack, stack_name, desired_statuses, timeout, executor=WAITER_EXECUTOR)
+
+
+DESIGN_REQUEST_PREAMBLE = """Design an AWS architecture and generate a CloudFormation template for the requirements below.
+
+Please provide:
+1. Architecture overview with reasoning
+2. CloudFormation template in YAML format
+3. Validation confirmation
+
+I'll handle the deployment once you provide the template."""
+
+
 @tool
 async def request_design_from_onboarding_agent(requirements: str) -> dict:
     """
@@ -167,57 +298,24 @@ async def request_design_from_onboarding_agent(requirements: str) -> dict:
             "error": "Onboarding Agent not configured. Deploy Onboarding Agent first."
         }
     
-    try:
-        logger.info(f"🤝 Calling Onboarding Agent via A2A for design")
-        
-        async with httpx.AsyncClient(timeout=300) as httpx_client:
-            # Get Onboarding Agent card
-            resolver = A2ACardResolver(httpx_client=httpx_client, base_url=ONBOARDING_AGENT_URL)
-            agent_card = await resolver.get_agent_card()
-            
-            # Create A2A client
-            config = ClientConfig(httpx_client=httpx_client, streaming=False)
-            factory = ClientFactory(config)
-            client = factory.create(agent_card)
-            
-            # Create message
-            message_text = f"""Design an AWS architecture and generate a CloudFormation template for:
-
-{requirements}
-
-Please provide:
-1. Architecture overview with reasoning
-2. CloudFormation template in YAML format
-3. Validation confirmation
+    embedding = await _DESIGN_CACHE.aembed(requirements)
+    cached = await _DESIGN_CACHE.aget(embedding)
+    if cached is not None:
+        logger.info("♻️  Reusing cached design from Onboarding Agent")
+        return {**cached, "cached": True}
+    
+    logger.info(f"🤝 Calling Onboarding Agent via A2A for design")
+    
+    message_text = f"""{DESIGN_REQUEST_PREAMBLE}
 
-I'll handle the deployment once you provide the template."""
-            
-            msg = Message(
-                kind="message",
-                role=Role.user,
-                parts=[Part(TextPart(kind="text", text=message_text))],
-                message_id=uuid4().hex,
-            )
-            
-            # Send message and get response
-            async for event in client.send_message(msg):
-                if isinstance(event, Message):
-                    response_text = ""
-                    for part in event.parts:
-                        if hasattr(part, 'text'):
-                            response_text += part.text
-                    
-                    logger.info(f"✅ Received design from Onboarding Agent")
-                    return {
-                        "success": True,
-                        "design_response": response_text
-                    }
-            
-            return {"success": False, "error": "No response from Onboarding Agent"}
-            
-    except Exception as e:
-        logger.error(f"❌ Error calling Onboarding Agent: {e}")
-        return {"success": False, "error": str(e)}
+Requirements:
+{requirements}"""
+    
+    result = await a2a_send(ONBOARDING_AGENT_URL, message_text, timeout=300, result_key="design_response")
+    if result["success"]:
+        logger.info(f"✅ Received design from Onboarding Agent")
+        _DESIGN_CACHE.put(embedding, result)
+    return result
 
 
 # Create Strands Agent
@@ -225,10 +323,12 @@ I'll handle the deployment once you provide the template."""
 provisioning_agent = Agent(
     name="AWS Provisioning Agent",
     description="Deploys CloudFormation templates to AWS and monitors deployment progress",
+    model=bedrock_model(BEDROCK_MODEL_ID, AWS_REGION),
     tools=[
         validate_cfn_template,
         deploy_cfn_stack,
         get_stack_status,
+        wait_for_stack,
         request_design_from_onboarding_agent
     ],
     system_prompt="""You are an AWS deployment specialist responsible for deploying CloudFormation templates.
@@ -247,7 +347,9 @@ Your workflow:
 
 3. DEPLOYMENT:
    - Use deploy_cfn_stack tool with stack name and template
-   - Monitor by checking get_stack_status tool every 10-15 seconds
+   - Then call wait_for_stack once (desired_statuses ["CREATE_COMPLETE"] for a new
+     stack, ["UPDATE_COMPLETE"] for an update); it waits server-side until the
+     deployment finishes, so do not poll get_stack_status in a loop
    - Report progress: CREATE_IN_PROGRESS → CREATE_COMPLETE
    - Handle failures: report errors, suggest rollback
 
@@ -259,7 +361,8 @@ Your workflow:
 Available tools:
 - validate_cfn_template: Validate templates (AWS API call)
 - deploy_cfn_stack: Deploy stacks (AWS API call)
-- get_stack_status: Check status and outputs (AWS API call)
+- get_stack_status: Check status and outputs once (AWS API call)
+- wait_for_stack: Wait for a deployment to finish and return final status (AWS waiter)
 - request_design_from_onboarding_agent: Get design help (A2A collaboration)
 
 Communication style:
@@ -268,7 +371,7 @@ Communication style:
 - Proactive about issues
 - Provide actionable next steps
 
-Remember: YOU monitor and decide when to check status. Tools just execute AWS API calls."""
+Remember: YOU decide what to deploy and how to report it. Tools just execute AWS API calls."""
 )
 
 # Create A2A server
@@ -279,7 +382,8 @@ a2a_server = A2AServer(
 )
 
 # Create FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 @app.get("/ping")
 def ping():
@@ -293,4 +397,4 @@ if __name__ == "__main__":
     logger.info("🚀 Starting Provisioning Agent (Strands A2A)")
     logger.info(f"Runtime URL: {AGENTCORE_RUNTIME_URL}")
     logger.info(f"Onboarding Agent: {ONBOARDING_AGENT_URL or 'Not configured yet'}")
-    uvicorn.run(app, host="0.0.0.0", port=9000)
+    run("provisioning_agent", app)
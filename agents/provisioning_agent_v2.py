@@ -6,15 +6,19 @@ CloudFormation deployment agent using AWS Labs CFN MCP server for operations.
 
 import logging
 import os
-from uuid import uuid4
-import httpx
-from a2a.client import A2ACardResolver, ClientConfig, ClientFactory
-from a2a.types import Message, Part, Role, TextPart
 from strands import Agent, tool
 from strands.multiagent.a2a import A2AServer
 from strands_tools.mcp import MCPClient
-import uvicorn
 from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+
+try:
+    from ._a2a import a2a_send, bedrock_model, lifespan, run
+    from ._semantic_cache import SemanticCache
+except ImportError:  # run as a script: python agents/<agent>.py
+    from _a2a import a2a_send, bedrock_model, lifespan, run
+    from _semantic_cache import SemanticCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,6 +26,12 @@ logger = logging.getLogger(__name__)
 # Configuration
 ONBOARDING_AGENT_URL = os.environ.get('ONBOARDING_AGENT_URL')
 AGENTCORE_RUNTIME_URL = os.environ.get('AGENTCORE_RUNTIME_URL', 'http://0.0.0.0:9000/')
+BEDROCK_MODEL_ID = os.environ.get('BEDROCK_MODEL_ID', 'us.anthropic.claude-sonnet-4-20250514-v1:0')
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+
+# Similar design requests are answered from cache instead of a full A2A turn
+_DESIGN_CACHE = SemanticCache(region_name=AWS_REGION)
+
 
 # Connect to AWS Labs CFN MCP Server
 logger.info("Connecting to AWS Labs CFN MCP Server...")
@@ -30,6 +40,11 @@ cfn_tools = mcp_client.get_tools()
 
 logger.info(f"Loaded {len(cfn_tools)} tools from AWS Labs CFN MCP Server")
 
+DESIGN_REQUEST_PREAMBLE = """Design an AWS architecture for the requirements below.
+
+Please generate a CloudFormation template."""
+
+
 # A2A collaboration tool
 @tool
 async def request_design_from_onboarding_agent(requirements: str) -> dict:
@@ -48,54 +63,31 @@ async def request_design_from_onboarding_agent(requirements: str) -> dict:
             "error": "Onboarding Agent not configured"
         }
     
-    try:
-        logger.info(f"🤝 Calling Onboarding Agent via A2A")
-        
-        async with httpx.AsyncClient(timeout=300) as httpx_client:
-            resolver = A2ACardResolver(httpx_client=httpx_client, base_url=ONBOARDING_AGENT_URL)
-            agent_card = await resolver.get_agent_card()
-            
-            config = ClientConfig(httpx_client=httpx_client, streaming=False)
-            factory = ClientFactory(config)
-            client = factory.create(agent_card)
-            
-            message_text = f"""Design an AWS architecture for:
-
-{requirements}
+    embedding = await _DESIGN_CACHE.aembed(requirements)
+    cached = await _DESIGN_CACHE.aget(embedding)
+    if cached is not None:
+        logger.info("♻️  Reusing cached design from Onboarding Agent")
+        return {**cached, "cached": True}
+    
+    logger.info(f"🤝 Calling Onboarding Agent via A2A")
+    
+    message_text = f"""{DESIGN_REQUEST_PREAMBLE}
 
-Please generate a CloudFormation template."""
-            
-            msg = Message(
-                kind="message",
-                role=Role.user,
-                parts=[Part(TextPart(kind="text", text=message_text))],
-                message_id=uuid4().hex,
-            )
-            
-            async for event in client.send_message(msg):
-                if isinstance(event, Message):
-                    response_text = ""
-                    for part in event.parts:
-                        if hasattr(part, 'text'):
-                            response_text += part.text
-                    
-                    logger.info(f"✅ Received design from Onboarding Agent")
-                    return {
-                        "success": True,
-                        "design_response": response_text
-                    }
-            
-            return {"success": False, "error": "No response"}
-            
-    except Exception as e:
-        logger.error(f"❌ Error calling Onboarding Agent: {e}")
-        return {"success": False, "error": str(e)}
+Requirements:
+{requirements}"""
+    
+    result = await a2a_send(ONBOARDING_AGENT_URL, message_text, timeout=300, result_key="design_response")
+    if result["success"]:
+        logger.info(f"✅ Received design from Onboarding Agent")
+        _DESIGN_CACHE.put(embedding, result)
+    return result
 
 
 # Create Strands Agent with AWS Labs MCP tools
 provisioning_agent = Agent(
     name="AWS Provisioning Agent",
     description="CloudFormation deployment specialist using AWS Labs CFN MCP server",
+    model=bedrock_model(BEDROCK_MODEL_ID, AWS_REGION),
     tools=[*cfn_tools, request_design_from_onboarding_agent],
     system_prompt="""You are an AWS deployment specialist.
 
@@ -127,7 +119,8 @@ a2a_server = A2AServer(
 )
 
 # Create FastAPI app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
 
 @app.get("/ping")
 def ping():
@@ -140,4 +133,4 @@ if __name__ == "__main__":
     logger.info("🚀 Starting Provisioning Agent v2 (AWS Labs CFN MCP)")
     logger.info(f"Runtime URL: {AGENTCORE_RUNTIME_URL}")
     logger.info(f"MCP Tools: {len(cfn_tools)}")
-    uvicorn.run(app, host="0.0.0.0", port=9000)
+    run("provisioning_agent_v2", app)
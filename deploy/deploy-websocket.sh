@@ -10,6 +10,9 @@ echo ""
 
 STACK_NAME="agentic-architect-websocket"
 REGION="${AWS_REGION:-us-east-1}"
+# S3 bucket for the packaged Lambda code (created on first deploy if unset)
+ACCOUNT_ID=$(aws sts get-caller-identity --query Account --output text)
+ARTIFACT_BUCKET="${ARTIFACT_BUCKET:-agentic-architect-artifacts-$ACCOUNT_ID-$REGION}"
 
 # Get agent ARNs
 ONBOARDING_ARN="${ONBOARDING_AGENT_ARN:-arn:aws:bedrock-agentcore:us-east-1:905767016260:runtime/onboarding_agent-j6Y9CIGVDj}"
@@ -18,14 +21,53 @@ PROVISIONING_ARN="${PROVISIONING_AGENT_ARN:-arn:aws:bedrock-agentcore:us-east-1:
 echo "Configuration:"
 echo "  Stack: $STACK_NAME"
 echo "  Region: $REGION"
+echo "  Artifact Bucket: $ARTIFACT_BUCKET"
 echo "  Onboarding Agent: $ONBOARDING_ARN"
 echo "  Provisioning Agent: $PROVISIONING_ARN"
 echo ""
 
+cd "$(dirname "$0")"
+
+if ! aws s3api head-bucket --bucket "$ARTIFACT_BUCKET" --region "$REGION" 2>/dev/null; then
+  echo "Creating artifact bucket $ARTIFACT_BUCKET..."
+  if [ "$REGION" = "us-east-1" ]; then
+    aws s3api create-bucket --bucket "$ARTIFACT_BUCKET" --region "$REGION"
+  else
+    aws s3api create-bucket --bucket "$ARTIFACT_BUCKET" --region "$REGION" \
+      --create-bucket-configuration LocationConstraint="$REGION"
+  fi
+fi
+
+BUILD_DIR="$(mktemp -d)"
+PACKAGED_TEMPLATE="$BUILD_DIR/packaged.yaml"
+trap 'rm -rf "$BUILD_DIR"' EXIT
+
+# Bundle the handler with orjson built for the Lambda runtime (python3.11,
+# x86_64); the template's Code path is relative to this copy of it
+echo "Building Lambda package..."
+mkdir "$BUILD_DIR/websocket_lambda"
+cp lambda_handler.py "$BUILD_DIR/websocket_lambda/"
+python3 -m pip install --quiet \
+  --target "$BUILD_DIR/websocket_lambda" \
+  --platform manylinux2014_x86_64 \
+  --implementation cp \
+  --python-version 3.11 \
+  --only-binary=:all: \
+  orjson
+cp websocket-infrastructure.yaml "$BUILD_DIR/"
+
+# Upload the Lambda package and point the template at it
+echo "Packaging Lambda code..."
+aws cloudformation package \
+  --template-file "$BUILD_DIR/websocket-infrastructure.yaml" \
+  --s3-bucket "$ARTIFACT_BUCKET" \
+  --output-template-file "$PACKAGED_TEMPLATE" \
+  --region "$REGION"
+
 # Deploy CloudFormation stack
 echo "Deploying CloudFormation stack..."
 aws cloudformation deploy \
-  --template-file websocket-infrastructure.yaml \
+  --template-file "$PACKAGED_TEMPLATE" \
   --stack-name "$STACK_NAME" \
   --parameter-overrides \
     OnboardingAgentArn="$ONBOARDING_ARN" \
@@ -2,182 +2,315 @@
 WebSocket Lambda handler for A2A Agents
 Uses boto3 bedrock-agent-runtime client for proper IAM permissions
 """
-import json
+import codecs
+import functools
+import hashlib
+import logging
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import boto3
+from botocore.config import Config
+
+try:
+    from orjson import dumps as json_dumps, loads as json_loads
+except ImportError:  # orjson not bundled with the function
+    from json import dumps as json_dumps, loads as json_loads
 
 ONBOARDING_AGENT_ARN = os.environ['ONBOARDING_AGENT_ARN']
 PROVISIONING_AGENT_ARN = os.environ['PROVISIONING_AGENT_ARN']
 REGION = os.environ.get('REGION', 'us-east-1')
+# 'optimized' uses latency-optimized inference where the agent's model supports it
+MODEL_LATENCY = os.environ.get('MODEL_LATENCY', 'optimized')
+
+# The Lambda runtime already attaches a handler to the root logger
+logger = logging.getLogger(__name__)
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+AGENT_ARNS = {
+    'onboarding': ONBOARDING_AGENT_ARN,
+    'provisioning': PROVISIONING_AGENT_ARN
+}
+# Agent IDs are the last segment of the agent ARNs
+AGENT_IDS = {agent_type: arn.split('/')[-1] for agent_type, arn in AGENT_ARNS.items()}
 
-lambda_client = boto3.client('lambda')
-bedrock_agent_runtime = boto3.client('bedrock-agent-runtime', region_name=REGION)
-apigw = None
+# Shared by every client: keep connections alive across warm invocations
+_CFG = Config(
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    retries={'mode': 'adaptive', 'max_attempts': 3},
+    read_timeout=300,
+    connect_timeout=5
+)
 
-def get_apigw_client(event):
-    global apigw
-    if apigw is None:
-        domain = event['requestContext']['domainName']
-        stage = event['requestContext']['stage']
-        endpoint = f"https://{domain}/{stage}"
-        apigw = boto3.client('apigatewaymanagementapi', endpoint_url=endpoint)
-    return apigw
+# Built on the first agent request; $connect/$disconnect never need it
+@functools.lru_cache(maxsize=None)
+def _bedrock():
+    return boto3.client('bedrock-agent-runtime', region_name=REGION, config=_CFG)
 
-def send_message(connection_id, message, event):
+@functools.lru_cache(maxsize=8)
+def _apigw(endpoint):
+    return boto3.client('apigatewaymanagementapi', endpoint_url=endpoint, config=_CFG)
+
+def send_message(connection_id, message, endpoint=None):
+    """Post a message to a WebSocket connection
+
+    endpoint defaults to the API Gateway stage of the current invocation.
+    """
     try:
-        client = get_apigw_client(event)
-        client.post_to_connection(
+        if endpoint is None:
+            endpoint = f"https://{os.environ['REQUEST_DOMAIN_NAME']}/{os.environ['STAGE']}"
+        _apigw(endpoint).post_to_connection(
             ConnectionId=connection_id,
-            Data=json.dumps(message)
+            Data=json_dumps(message)
         )
         return True
     except Exception as e:
-        print(f"Error sending message: {e}")
+        logger.warning("Error sending message to %s: %s", connection_id, e)
         return False
 
-def call_a2a_agent(agent_arn, message, session_id):
-    """Call A2A agent using bedrock-agent-runtime client"""
-    print(f"Calling agent: {agent_arn}")
-    print(f"Session: {session_id}")
-    print(f"Message: {message[:100]}")
-    
-    # Extract agent ID from ARN
-    agent_id = agent_arn.split('/')[-1]
+# Token frames are batched to about STREAM_CHUNK_BYTES, or sent once
+# STREAM_FLUSH_MS has passed since the last frame, and posted concurrently
+STREAM_CHUNK_BYTES = int(os.environ.get('STREAM_CHUNK_BYTES', '256'))
+STREAM_FLUSH_SECONDS = int(os.environ.get('STREAM_FLUSH_MS', '40')) / 1000
+send_pool = ThreadPoolExecutor(max_workers=4)
+
+class TokenStream:
+    """Batch agent chunks into numbered 'token' frames
+
+    Frames are posted from send_pool and may arrive out of order; clients
+    reassemble them by seq. close() flushes and waits for every post.
+    """
+
+    def __init__(self, connection_id, request_id, endpoint):
+        self.connection_id = connection_id
+        self.request_id = request_id
+        self.endpoint = endpoint
+        self.buffer = []
+        self.buffered = 0
+        self.seq = 0
+        self.posts = []
+        self.last_flush = time.monotonic()
+
+    def write(self, text):
+        self.buffer.append(text)
+        self.buffered += len(text)
+        if (self.buffered >= STREAM_CHUNK_BYTES
+                or time.monotonic() - self.last_flush >= STREAM_FLUSH_SECONDS):
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            frame = {
+                'type': 'token',
+                'requestId': self.request_id,
+                'seq': self.seq,
+                'text': ''.join(self.buffer)
+            }
+            self.posts.append(send_pool.submit(send_message, self.connection_id, frame, self.endpoint))
+            self.seq += 1
+            self.buffer = []
+            self.buffered = 0
+        self.last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        for post in self.posts:
+            post.result()
+
+def decode_completion(completion):
+    """Yield the text of completion chunks; a character may span two chunks"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    for event in completion:
+        if 'chunk' in event and 'bytes' in event['chunk']:
+            text = decoder.decode(event['chunk']['bytes'])
+            if text:
+                yield text
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+def call_a2a_agent(agent_id, message, session_id, on_chunk=None):
+    """Call A2A agent using bedrock-agent-runtime client
+
+    When on_chunk is given, each decoded chunk is passed to it as it arrives
+    and the full response is not collected.
+    """
+    logger.info("Calling agent=%s session=%s", agent_id, session_id)
+    logger.debug("Message: %.100s", message)
     
     try:
-        response = bedrock_agent_runtime.invoke_agent(
+        response = _bedrock().invoke_agent(
             agentId=agent_id,
             agentAliasId='DEFAULT',
             sessionId=session_id,
-            inputText=message
+            inputText=message,
+            bedrockModelConfigurations={'performanceConfig': {'latency': MODEL_LATENCY}}
         )
         
-        # Collect streaming response
-        response_text = ''
-        for event in response['completion']:
-            if 'chunk' in event:
-                chunk = event['chunk']
-                if 'bytes' in chunk:
-                    response_text += chunk['bytes'].decode('utf-8')
+        # Forward or collect the streaming response
+        response_length = 0
+        chunks = []
+        for text in decode_completion(response['completion']):
+            response_length += len(text)
+            if on_chunk:
+                on_chunk(text)
+            else:
+                chunks.append(text)
         
-        print(f"Response length: {len(response_text)}")
+        logger.info("Response length: %d", response_length)
         
         return {
-            'response': response_text,
+            'response': ''.join(chunks),
             'sessionId': session_id
         }
         
     except Exception as e:
-        print(f"Error calling agent: {e}")
+        logger.error("Error calling agent %s: %s", agent_id, e)
         raise
 
-def lambda_handler(event, context):
-    route_key = event.get('requestContext', {}).get('routeKey')
-    connection_id = event.get('requestContext', {}).get('connectionId')
+def process_request(job):
+    """Call the agent and stream its reply back to the WebSocket connection
+
+    job holds only agentType, message, requestId, sessionId, connectionId,
+    domain and stage.
+    """
+    agent_type = job['agentType']
+    request_id = job['requestId']
+    connection_id = job['connectionId']
+    # Explicit endpoint: a timed-out worker may outlive this invocation
+    endpoint = f"https://{job['domain']}/{job['stage']}"
     
-    # Async processing
-    if 'async_processing' in event:
-        async_event = event['async_processing']
-        agent_type = async_event['agentType']
-        message = async_event['message']
-        request_id = async_event['requestId']
-        session_id = async_event['sessionId']
-        connection_id = async_event['connectionId']
-        original_event = async_event['event']
-        
-        print(f"Async processing: {agent_type}")
-        
-        try:
-            send_message(connection_id, {
-                'type': 'progress',
-                'requestId': request_id,
-                'message': 'Agent is thinking...'
-            }, original_event)
-            
-            agent_arn = ONBOARDING_AGENT_ARN if agent_type == 'onboarding' else PROVISIONING_AGENT_ARN
-            result = call_a2a_agent(agent_arn, message, session_id)
-            
-            send_message(connection_id, {
-                'type': 'response',
-                'requestId': request_id,
-                'agentType': agent_type,
-                'response': result['response'],
-                'sessionId': result['sessionId']
-            }, original_event)
-        
-        except Exception as e:
-            print(f"Error: {e}")
-            import traceback
-            traceback.print_exc()
-            send_message(connection_id, {
-                'type': 'error',
-                'requestId': request_id,
-                'error': str(e)
-            }, original_event)
-        
-        return {'statusCode': 200}
+    logger.info("Processing: %s", agent_type)
     
-    # WebSocket routes
     try:
-        if route_key == '$connect':
-            send_message(connection_id, {
-                'type': 'connected',
-                'message': 'Connected to Agentic-Architect'
-            }, event)
-            return {'statusCode': 200}
-        
-        elif route_key == '$disconnect':
-            print(f"Disconnected: {connection_id}")
-            return {'statusCode': 200}
+        send_message(connection_id, {
+            'type': 'progress',
+            'requestId': request_id,
+            'message': 'Agent is thinking...'
+        }, endpoint)
         
-        elif route_key == '$default':
-            body = json.loads(event.get('body', '{}'))
-            request_id = body.get('id')
-            agent_type = body.get('agentType', 'onboarding')
-            message = body.get('message')
-            session_id = body.get('sessionId', f"session-{request_id}")
-            
-            print(f"Agent: {agent_type}, Request: {request_id}")
-            
-            send_message(connection_id, {
-                'type': 'acknowledged',
-                'requestId': request_id,
-                'agentType': agent_type
-            }, event)
-            
-            # Invoke async
-            lambda_client.invoke(
-                FunctionName=context.function_name,
-                InvocationType='Event',
-                Payload=json.dumps({
-                    'async_processing': {
-                        'agentType': agent_type,
-                        'message': message,
-                        'requestId': request_id,
-                        'sessionId': session_id,
-                        'connectionId': connection_id,
-                        'event': event
-                    }
-                })
+        agent_id = AGENT_IDS[agent_type]
+        tokens = TokenStream(connection_id, request_id, endpoint)
+        try:
+            result = call_a2a_agent(
+                agent_id, job['message'], job['sessionId'], on_chunk=tokens.write
             )
-            
-            return {'statusCode': 200}
+        finally:
+            # Every token frame is delivered before the final frame
+            tokens.close()
         
+        send_message(connection_id, {
+            'type': 'response_complete',
+            'requestId': request_id,
+            'agentType': agent_type,
+            'sessionId': result['sessionId'],
+            # Number of token frames sent, so clients can detect lost frames
+            'frames': tokens.seq
+        }, endpoint)
+    
+    except Exception as e:
+        logger.exception("Request failed")
+        send_message(connection_id, {
+            'type': 'error',
+            'requestId': request_id,
+            'error': str(e)
+        }, endpoint)
+
+def _h_connect(event, context):
+    send_message(event['requestContext']['connectionId'], {
+        'type': 'connected',
+        'message': 'Connected to Agentic-Architect'
+    })
+    return {'statusCode': 200}
+
+def _h_disconnect(event, context):
+    logger.info("Disconnected: %s", event['requestContext']['connectionId'])
+    return {'statusCode': 200}
+
+def _h_default(event, context):
+    request_context = event['requestContext']
+    connection_id = request_context['connectionId']
+    body = json_loads(event.get('body') or '{}')
+    request_id = body.get('id')
+    agent_type = body.get('agentType', 'onboarding')
+    message = body.get('message')
+    # Without a client session, keep one Bedrock session per connection.
+    # Connection IDs may contain '=' and other characters invoke_agent
+    # rejects, so derive the session ID from a hash of the connection ID
+    session_id = body.get('sessionId') or 'conn-' + hashlib.sha256(connection_id.encode()).hexdigest()[:32]
+    
+    logger.info("Agent: %s, Request: %s", agent_type, request_id)
+    
+    if agent_type not in AGENT_IDS:
+        send_message(connection_id, {
+            'type': 'error',
+            'requestId': request_id,
+            'error': f"Unknown agentType: {agent_type}"
+        })
         return {'statusCode': 400}
     
+    send_message(connection_id, {
+        'type': 'acknowledged',
+        'requestId': request_id,
+        'agentType': agent_type
+    })
+    
+    # Run the agent call in this invocation; the thread lets us stop
+    # waiting and report a timeout before Lambda kills the container
+    job = {
+        'agentType': agent_type,
+        'message': message,
+        'requestId': request_id,
+        'sessionId': session_id,
+        'connectionId': connection_id,
+        'domain': request_context['domainName'],
+        'stage': request_context['stage']
+    }
+    worker = threading.Thread(target=process_request, args=(job,))
+    worker.start()
+    worker.join(timeout=context.get_remaining_time_in_millis() / 1000 - 2)
+    
+    if worker.is_alive():
+        logger.warning("Timed out: %s", request_id)
+        send_message(connection_id, {
+            'type': 'error',
+            'requestId': request_id,
+            'error': 'Agent did not finish before the request timed out'
+        })
+    
+    return {'statusCode': 200}
+
+def _h_bad(event, context):
+    return {'statusCode': 400}
+
+# WebSocket routes
+HANDLERS = {
+    '$connect': _h_connect,
+    '$disconnect': _h_disconnect,
+    '$default': _h_default
+}
+
+def lambda_handler(event, context):
+    request_context = event.get('requestContext', {})
+    route_key = request_context.get('routeKey')
+    
+    # send_message() posts back through the stage that invoked us
+    if 'domainName' in request_context:
+        os.environ['REQUEST_DOMAIN_NAME'] = request_context['domainName']
+        os.environ['STAGE'] = request_context['stage']
+    
+    try:
+        return HANDLERS.get(route_key, _h_bad)(event, context)
+    
     except Exception as e:
-        print(f"Error: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception("Request failed")
         
         if route_key == '$default':
-            try:
-                send_message(connection_id, {
-                    'type': 'error',
-                    'requestId': body.get('id'),
-                    'error': str(e)
-                }, event)
-            except:
-                pass
+            send_message(request_context.get('connectionId'), {
+                'type': 'error',
+                'error': str(e)
+            })
         
         return {'statusCode': 500}
@@ -0,0 +1,27 @@
+"""
+Shared pytest configuration
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Make the repository root importable (agents package) for every test module
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "integration: calls live AWS APIs (set RUN_INTEGRATION_TESTS=1 to run)"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.environ.get("RUN_INTEGRATION_TESTS"):
+        return
+    skip = pytest.mark.skip(reason="live AWS test; set RUN_INTEGRATION_TESTS=1 to run")
+    for item in items:
+        if "integration" in item.keywords:
+            item.add_marker(skip)
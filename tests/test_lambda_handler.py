@@ -0,0 +1,197 @@
+"""
+Tests for the WebSocket Lambda handler helpers
+"""
+
+import os
+import re
+import threading
+
+import pytest
+
+os.environ.setdefault("ONBOARDING_AGENT_ARN", "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/onboarding_agent-test")
+os.environ.setdefault("PROVISIONING_AGENT_ARN", "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/provisioning_agent-test")
+
+from deploy import lambda_handler
+
+
+def completion(*parts):
+    """Bedrock completion events carrying the given byte strings."""
+    return [{"chunk": {"bytes": part}} for part in parts]
+
+
+class FakeAgentRuntime:
+    """Stands in for the bedrock-agent-runtime client."""
+
+    def __init__(self, *parts):
+        self.parts = parts
+        self.calls = []
+
+    def invoke_agent(self, **kwargs):
+        self.calls.append(kwargs)
+        return {"completion": completion(*self.parts)}
+
+
+@pytest.fixture
+def runtime(monkeypatch):
+    fake = FakeAgentRuntime(b"Hello, ", b"world")
+    monkeypatch.setattr(lambda_handler, "_bedrock", lambda: fake)
+    return fake
+
+
+def test_decode_completion_joins_split_multibyte_characters():
+    data = "Déployé € ✅".encode("utf-8")
+    # Split inside the two-byte 'é', the three-byte '€' and the '✅'
+    parts = [data[:2], data[2:11], data[11:12], data[12:]]
+
+    text = "".join(lambda_handler.decode_completion(completion(*parts)))
+
+    assert text == "Déployé € ✅"
+
+
+def test_decode_completion_skips_events_without_bytes():
+    events = [{"trace": {}}, {"chunk": {}}, {"chunk": {"bytes": b"ok"}}]
+
+    assert list(lambda_handler.decode_completion(events)) == ["ok"]
+
+
+def test_call_a2a_agent_collects_response(runtime):
+    result = lambda_handler.call_a2a_agent("agent", "hi", "session")
+
+    assert result == {"response": "Hello, world", "sessionId": "session"}
+    assert runtime.calls[0]["sessionId"] == "session"
+
+
+def test_call_a2a_agent_streams_chunks(runtime):
+    chunks = []
+    result = lambda_handler.call_a2a_agent("agent", "hi", "session", on_chunk=chunks.append)
+
+    assert chunks == ["Hello, ", "world"]
+    assert result["response"] == ""
+
+
+@pytest.fixture
+def frames(monkeypatch):
+    sent = []
+    monkeypatch.setattr(lambda_handler, "send_message",
+                        lambda connection_id, message, endpoint=None: sent.append(message))
+    monkeypatch.setattr(lambda_handler, "STREAM_CHUNK_BYTES", 5)
+    monkeypatch.setattr(lambda_handler, "STREAM_FLUSH_SECONDS", 3600)
+    return sent
+
+
+def test_token_stream_batches_and_numbers_frames(frames):
+    stream = lambda_handler.TokenStream("conn", "req", "https://example.com/prod")
+    for text in ["ab", "cd", "e", "fg", "h"]:
+        stream.write(text)
+    stream.close()
+
+    frames.sort(key=lambda frame: frame["seq"])
+    assert [frame["text"] for frame in frames] == ["abcde", "fgh"]
+    assert [frame["seq"] for frame in frames] == [0, 1]
+    assert all(frame["type"] == "token" and frame["requestId"] == "req" for frame in frames)
+
+
+def test_token_stream_flushes_after_interval(frames, monkeypatch):
+    monkeypatch.setattr(lambda_handler, "STREAM_FLUSH_SECONDS", 0)
+    stream = lambda_handler.TokenStream("conn", "req", "https://example.com/prod")
+    stream.write("a")
+    stream.write("b")
+    stream.close()
+
+    assert sorted(frame["text"] for frame in frames) == ["a", "b"]
+
+
+def test_token_stream_close_without_output_sends_nothing(frames):
+    lambda_handler.TokenStream("conn", "req", "https://example.com/prod").close()
+
+    assert frames == []
+
+
+def test_response_complete_counts_token_frames(runtime, frames):
+    lambda_handler.process_request({
+        "agentType": "onboarding",
+        "message": "hi",
+        "requestId": "req",
+        "sessionId": "session",
+        "connectionId": "conn",
+        "domain": "example.com",
+        "stage": "prod"
+    })
+
+    tokens = [frame for frame in frames if frame["type"] == "token"]
+    assert frames[-1]["type"] == "response_complete"
+    assert frames[-1]["frames"] == len(tokens) == 2
+
+
+class FakeContext:
+    """Lambda context with a fixed amount of time left."""
+
+    def __init__(self, remaining_ms=600_000):
+        self.remaining_ms = remaining_ms
+
+    def get_remaining_time_in_millis(self):
+        return self.remaining_ms
+
+
+def websocket_event(body, connection_id="L0SM9cOFvHcCIhw="):
+    return {
+        "requestContext": {
+            "routeKey": "$default",
+            "connectionId": connection_id,
+            "domainName": "example.com",
+            "stage": "prod"
+        },
+        "body": body
+    }
+
+
+@pytest.fixture
+def jobs(monkeypatch):
+    """Record the jobs _h_default hands to process_request."""
+    received = []
+    monkeypatch.setattr(lambda_handler, "process_request", received.append)
+    return received
+
+
+def test_default_session_id_is_valid_for_invoke_agent(jobs, frames):
+    body = '{"id": "1", "agentType": "onboarding", "message": "hi"}'
+    lambda_handler._h_default(websocket_event(body), FakeContext())
+    lambda_handler._h_default(websocket_event(body), FakeContext())
+    lambda_handler._h_default(websocket_event(body, "OtherConnId="), FakeContext())
+
+    session_ids = [job["sessionId"] for job in jobs]
+    assert re.fullmatch(r"[0-9a-zA-Z._:-]+", session_ids[0])
+    # One session per connection
+    assert session_ids[0] == session_ids[1] != session_ids[2]
+
+
+def test_client_session_id_is_kept(jobs, frames):
+    body = '{"id": "1", "agentType": "onboarding", "message": "hi", "sessionId": "session-1"}'
+    lambda_handler._h_default(websocket_event(body), FakeContext())
+
+    assert jobs[0]["sessionId"] == "session-1"
+
+
+def test_unknown_agent_type_is_rejected_without_ack(jobs, frames):
+    body = '{"id": "1", "agentType": "billing", "message": "hi"}'
+    response = lambda_handler._h_default(websocket_event(body), FakeContext())
+
+    assert response == {"statusCode": 400}
+    assert [frame["type"] for frame in frames] == ["error"]
+    assert "billing" in frames[0]["error"]
+    assert jobs == []
+
+
+def test_reports_timeout_before_lambda_deadline(monkeypatch, frames):
+    release = threading.Event()
+    monkeypatch.setattr(lambda_handler, "process_request", lambda job: release.wait(5))
+    body = '{"id": "1", "agentType": "onboarding", "message": "hi"}'
+    try:
+        # 2.1 s left: the handler waits 0.1 s, keeping 2 s to report the timeout
+        response = lambda_handler._h_default(websocket_event(body), FakeContext(remaining_ms=2100))
+    finally:
+        release.set()
+
+    assert response == {"statusCode": 200}
+    assert [frame["type"] for frame in frames] == ["acknowledged", "error"]
+    assert frames[-1]["requestId"] == "1"
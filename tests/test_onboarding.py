@@ -4,21 +4,24 @@ Tests for Onboarding Agent
 
 import pytest
 import asyncio
-import sys
-import os
-
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from agents.onboarding_agent import OnboardingAgent
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def agent():
-    """Create onboarding agent instance."""
+    """Create onboarding agent instance (shared by the module)."""
     return OnboardingAgent()
 
 
+@pytest.fixture(autouse=True)
+def reset_agent(agent):
+    """Give every test an empty conversation and design."""
+    agent.conversation_history.clear()
+    agent.current_design.clear()
+    yield
+
+
 @pytest.mark.asyncio
 async def test_start_conversation(agent):
     """Test starting a conversation."""
@@ -4,21 +4,37 @@ Tests for Provisioning Agent
 
 import pytest
 import asyncio
-import sys
-import os
-
-# Add parent directory to path
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from botocore.stub import Stubber
 
 from agents.provisioning_agent import ProvisioningAgent
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def agent():
-    """Create provisioning agent instance."""
+    """Create provisioning agent instance (shared by the module)."""
     return ProvisioningAgent()
 
 
+@pytest.fixture(autouse=True)
+def reset_agent(agent):
+    """Give every test an empty deployment history."""
+    agent.deployment_history.clear()
+    yield
+
+
+@pytest.fixture
+def missing_stack(agent):
+    """Stub CloudFormation so describe_stacks reports the stack as missing."""
+    with Stubber(agent.cfn_client) as stubber:
+        stubber.add_client_error(
+            'describe_stacks',
+            service_error_code='ValidationError',
+            service_message='Stack with id non-existent-stack-12345 does not exist',
+            http_status_code=400
+        )
+        yield stubber
+
+
 @pytest.fixture
 def sample_template():
     """Sample CloudFormation template."""
@@ -64,20 +80,21 @@ def test_extract_text(agent):
     assert text == '{"success": true}'
 
 
-def test_check_stack_exists(agent):
+def test_check_stack_exists(agent, missing_stack):
     """Test stack existence check."""
     # This will fail for non-existent stack
     exists = agent._check_stack_exists("non-existent-stack-12345")
     assert exists == False
 
 
-def test_get_stack_outputs(agent):
+def test_get_stack_outputs(agent, missing_stack):
     """Test getting stack outputs."""
     # This will return empty for non-existent stack
     outputs = agent._get_stack_outputs("non-existent-stack-12345")
     assert isinstance(outputs, list)
 
 
+@pytest.mark.integration
 @pytest.mark.asyncio
 async def test_get_stack_status_nonexistent(agent):
     """Test getting status of non-existent stack."""
@@ -0,0 +1,48 @@
+"""
+Tests for the semantic design-response cache
+"""
+
+import pytest
+
+from agents._semantic_cache import SemanticCache
+
+
+@pytest.fixture
+def semantic_cache():
+    return SemanticCache(region_name="us-east-1", threshold=0.9, max_entries=2)
+
+
+def test_normalize():
+    assert SemanticCache.normalize("  Deploy   an S3\nBucket ") == "deploy an s3 bucket"
+
+
+def test_matches_above_threshold(semantic_cache):
+    semantic_cache.put([1.0, 0.0], {"design_response": "x"})
+
+    assert semantic_cache.get([0.95, 0.3122]) == {"design_response": "x"}
+    assert semantic_cache.get([0.6, 0.8]) is None
+    assert semantic_cache.get(None) is None
+
+
+def test_returns_best_match(semantic_cache):
+    semantic_cache.put([1.0, 0.0], {"design_response": "x"})
+    semantic_cache.put([0.0, 1.0], {"design_response": "y"})
+
+    assert semantic_cache.get([0.1, 0.995]) == {"design_response": "y"}
+
+
+def test_evicts_oldest(semantic_cache):
+    semantic_cache.put([1.0, 0.0], {"design_response": "x"})
+    semantic_cache.put([0.0, 1.0], {"design_response": "y"})
+    semantic_cache.put([-1.0, 0.0], {"design_response": "z"})
+
+    assert semantic_cache.get([1.0, 0.0]) is None
+    assert semantic_cache.get([-1.0, 0.0]) == {"design_response": "z"}
+
+
+@pytest.mark.asyncio
+async def test_aget(semantic_cache):
+    semantic_cache.put([1.0, 0.0], {"design_response": "x"})
+
+    assert await semantic_cache.aget([1.0, 0.0]) == {"design_response": "x"}
+    assert await semantic_cache.aget(None) is None
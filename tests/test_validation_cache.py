@@ -0,0 +1,60 @@
+"""
+Tests for the CloudFormation validation cache
+"""
+
+import pytest
+
+from agents import _validation_cache
+from agents._validation_cache import ValidationCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable clock for the cache's TTL checks."""
+    now = [1000.0]
+    monkeypatch.setattr(_validation_cache, "monotonic", lambda: now[0])
+    return now
+
+
+def test_key_is_content_hash():
+    assert ValidationCache.key("a") == ValidationCache.key("a")
+    assert ValidationCache.key("a") != ValidationCache.key("b")
+
+
+def test_valid_results_do_not_expire(clock):
+    cache = ValidationCache(negative_ttl=60)
+    cache.put("k", {"success": True, "valid": True})
+
+    clock[0] += 3600
+    assert cache.get("k") == {"success": True, "valid": True}
+
+
+def test_negative_results_expire(clock):
+    cache = ValidationCache(negative_ttl=60)
+    cache.put("k", {"success": False, "valid": False, "error": "bad"})
+
+    clock[0] += 59
+    assert cache.get("k")["error"] == "bad"
+
+    clock[0] += 2
+    assert cache.get("k") is None
+
+
+def test_evicts_least_recently_used():
+    cache = ValidationCache(max_entries=2)
+    cache.put("a", {"valid": True})
+    cache.put("b", {"valid": True})
+    cache.get("a")
+    cache.put("c", {"valid": True})
+
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.get("c") is not None
+
+
+def test_returns_copies():
+    cache = ValidationCache()
+    cache.put("k", {"valid": True})
+    cache.get("k")["valid"] = False
+
+    assert cache.get("k") == {"valid": True}